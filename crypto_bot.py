@@ -1,20 +1,200 @@
 import time
-import json
+import csv
+import operator
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pybit.unified_trading import HTTP
 import websocket
 import threading
-from collections import deque
+import queue
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import ssl
 import os
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Prefer orjson for the WebSocket hot path; fall back to the stdlib
+try:
+    from orjson import loads, dumps
+except ImportError:
+    from json import loads, dumps
+
+# pyarrow is optional; it enables pandas' multi-threaded CSV parser
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+# Numba is optional; without it the aggregation kernel runs as plain Python
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        return lambda func: func
+
 logger = logging.getLogger(__name__)
 
+
+def start_queue_logging():
+    """
+    Send INFO logging through a queue to a background listener thread
+    
+    The calling thread still builds each message and enqueues the record;
+    the listener adds the timestamp and writes to the console. Does nothing
+    if the root logger is already configured.
+    
+    Returns:
+        QueueListener: The started listener (pass to stop_queue_logging),
+            or None if logging was left untouched
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    
+    root.setLevel(logging.INFO)
+    root.addHandler(queue_handler)
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener
+
+
+def stop_queue_logging(listener):
+    """
+    Flush and stop a listener from start_queue_logging and remove its handler
+    """
+    if listener is None:
+        return
+    
+    listener.stop()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, QueueHandler) and handler.queue is listener.queue:
+            root.removeHandler(handler)
+
+# Column order used for candle records and CSV files
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover']
+_candle_row = operator.itemgetter(*CANDLE_COLUMNS)  # Candle dict -> CSV row tuple
+
+# CSV dtypes; timestamps are kept as int64 milliseconds since the epoch
+CANDLE_DTYPES = {
+    'timestamp': 'int64', 'open': 'float64', 'high': 'float64', 'low': 'float64',
+    'close': 'float64', 'volume': 'float64', 'turnover': 'float64'
+}
+
+# Slots of the live candle state (a flat list, or a float64 array for Numba)
+OPEN, HIGH, LOW, CLOSE, VOLUME, TURNOVER, TRADE_COUNT = range(7)
+EMPTY_CANDLE = [0.0] * 7
+
+
+def format_ms(timestamp_ms):
+    """
+    Format a millisecond epoch timestamp as a UTC string for logging
+    """
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _coalesce_trades(ts, prices, volumes):
+    """
+    Merge consecutive trades that share a millisecond timestamp
+    
+    Args:
+        ts, prices, volumes: Trade columns for the batch
+    
+    Returns:
+        tuple: (ts, ticks) with one row per millisecond; each row of ticks
+            holds that millisecond's trades in the candle state layout
+            (see OPEN..TRADE_COUNT)
+    """
+    n = len(ts)
+    starts = np.flatnonzero(np.concatenate(([True], ts[1:] != ts[:-1])))
+    ends = np.append(starts[1:], n)
+    
+    ticks = np.empty((len(starts), 7))
+    ticks[:, OPEN] = prices[starts]
+    ticks[:, HIGH] = np.maximum.reduceat(prices, starts)
+    ticks[:, LOW] = np.minimum.reduceat(prices, starts)
+    ticks[:, CLOSE] = prices[ends - 1]
+    ticks[:, VOLUME] = np.add.reduceat(volumes, starts)
+    ticks[:, TURNOVER] = np.add.reduceat(prices * volumes, starts)
+    ticks[:, TRADE_COUNT] = ends - starts
+    return ts[starts], ticks
+
+
+def _make_trade_parser(topic, ts_append, px_append, vol_append):
+    """
+    Build a message parser specialised for one publicTrade topic
+    
+    The topic and the batch appenders are bound in the closure, so parsing
+    a frame does no attribute lookups on the bot.
+    
+    Args:
+        topic (str): Exact topic to accept, e.g. publicTrade.BTCUSDT
+        ts_append, px_append, vol_append: Appenders for the trade columns
+    """
+    def parse(message):
+        data = loads(message)
+        if data.get('topic') != topic:
+            return
+        
+        for trade in data['data']:
+            timestamp = int(trade['T'])
+            price = float(trade['p'])
+            volume = float(trade['v'])
+            ts_append(timestamp)
+            px_append(price)
+            vol_append(volume)
+    
+    return parse
+
+
+@njit(cache=True, fastmath=True)
+def _aggregate_ticks(ts_ms, ticks, start, bucket, state):
+    """
+    Fold coalesced trades into the candle state until the minute bucket rolls over
+    
+    Args:
+        ts_ms: Millisecond timestamps of the ticks
+        ticks: Coalesced trades from _coalesce_trades
+        start (int): Index of the first tick to aggregate
+        bucket (int): Minute bucket of the candle (ms timestamp // 60000)
+        state: Candle state (see OPEN..TRADE_COUNT); empty when its
+            trade count is 0
+    
+    Returns:
+        int: Index of the first tick in a later bucket, or the batch length
+    """
+    n = len(ts_ms)
+    for i in range(start, n):
+        if ts_ms[i] // 60000 > bucket:
+            return i
+        
+        tick = ticks[i]
+        if state[TRADE_COUNT] == 0:
+            state[OPEN] = tick[OPEN]
+            state[HIGH] = tick[HIGH]
+            state[LOW] = tick[LOW]
+        else:
+            if tick[HIGH] > state[HIGH]:
+                state[HIGH] = tick[HIGH]
+            if tick[LOW] < state[LOW]:
+                state[LOW] = tick[LOW]
+        
+        state[CLOSE] = tick[CLOSE]
+        state[VOLUME] += tick[VOLUME]
+        state[TURNOVER] += tick[TURNOVER]
+        state[TRADE_COUNT] += tick[TRADE_COUNT]
+    return n
+
 class CryptoBot:
     def __init__(self, symbol="BTCUSDT", data_dir="data"):
         """
@@ -33,19 +213,53 @@ class CryptoBot:
         # Initialize Bybit HTTP client for mainnet
         self.session = HTTP(testnet=False)
         
-        # Data storage
-        self.historical_data = pd.DataFrame()
-        self.live_trades = deque(maxlen=10000)  # Store recent trades
-        self.current_candle = None
-        self.candle_start_time = None
+        # Data storage (list of candle dicts, oldest first)
+        self._candles = []
+        # CSV file currently being appended to and how many candles it holds
+        self._csv_filename = None
+        self._csv_flushed_idx = 0
+        # Rows waiting for the background CSV writer thread
+        self._write_q = queue.Queue()
+        self.writer_thread = None
+        self._failed_csv = set()  # Files left incomplete by a failed write
+        # Recent trades as a ring buffer of columns; _trade_head counts
+        # every trade received, the newest is at (_trade_head - 1) % size
+        self._live_ts = np.empty(10000, dtype=np.int64)
+        self._live_px = np.empty(10000, dtype=np.float64)
+        self._live_vol = np.empty(10000, dtype=np.float64)
+        self._trade_head = 0
+        # Live candle (see OPEN..TRADE_COUNT); Numba needs a float64 array
+        self._candle_state = np.zeros(7) if HAVE_NUMBA else list(EMPTY_CANDLE)
+        self._candle_bucket = -1  # Current candle minute (ms timestamp // 60000)
+        self._finalized = []  # Finalized candles not yet logged
+        
+        # Raw messages handed from the WebSocket thread to the consumer
+        # thread, which decodes them into trades and builds candles
+        self._raw_q = queue.SimpleQueue()
+        
+        # Decoded trades waiting to be aggregated, and the preallocated
+        # arrays they are copied into for the aggregation kernel
+        self._batch_ts = []
+        self._batch_px = []
+        self._batch_vol = []
+        self._ts_buf = np.empty(4096, dtype=np.int64)
+        self._px_buf = np.empty(4096, dtype=np.float64)
+        self._vol_buf = np.empty(4096, dtype=np.float64)
+        self._parse_trades = _make_trade_parser(
+            f"publicTrade.{self.symbol}",
+            self._batch_ts.append, self._batch_px.append, self._batch_vol.append
+        )
         
         # WebSocket connection
         self.ws = None
         self.ws_thread = None
+        self.consumer_thread = None
+        self._subscribe_payload = None
         self.running = False
         
-        # Lock for thread safety
-        self.data_lock = threading.Lock()
+        # TLS context for the WebSocket (certificate and hostname checks on)
+        self._ssl_context = ssl.create_default_context()
+        self._ssl_context.set_alpn_protocols(['http/1.1'])
         
     def get_data_filename(self, suffix="historical"):
         """
@@ -60,21 +274,136 @@ class CryptoBot:
     def save_historical_data(self):
         """
         Save historical data to CSV file
+        
+        Only candles added since the previous save are appended. The file is
+        rewritten in full when the target filename changes (first save, or
+        a new day). The write itself happens on the background writer
+        thread; call stop_writer() to wait for it to finish.
         """
         try:
-            with self.data_lock:
-                if not self.historical_data.empty:
-                    filename = self.get_data_filename("historical")
-                    self.historical_data.to_csv(filename, index=False)
-                    logger.info(f"Historical data saved to {filename} ({len(self.historical_data)} records)")
-                    return filename
-                else:
-                    logger.warning("No historical data to save")
-                    return None
+            if self._candles:
+                filename = self.get_data_filename("historical")
+                new_file = filename != self._csv_filename
+                if new_file:
+                    self._csv_flushed_idx = 0
+                
+                rows = self._candles[self._csv_flushed_idx:]
+                self._csv_filename = filename
+                self._csv_flushed_idx += len(rows)
+                
+                self._start_writer()
+                self._write_q.put((filename, new_file, rows))
+                return filename
+            else:
+                logger.warning("No historical data to save")
+                return None
         except Exception as e:
             logger.error(f"Error saving historical data: {e}")
             return None
     
+    def _start_writer(self):
+        """
+        Start the background CSV writer thread if it is not running
+        """
+        if self.writer_thread is None or not self.writer_thread.is_alive():
+            self.writer_thread = threading.Thread(target=self._write_loop)
+            self.writer_thread.daemon = True
+            self.writer_thread.start()
+    
+    def stop_writer(self):
+        """
+        Wait for queued CSV writes to finish and stop the writer thread
+        """
+        if self.writer_thread and self.writer_thread.is_alive():
+            self._write_q.put(None)
+            self.writer_thread.join()
+    
+    def _write_loop(self):
+        """
+        Writer thread: append queued rows to CSV files until stopped
+        """
+        get = self._write_q.get
+        get_nowait = self._write_q.get_nowait
+        while True:
+            # Write everything that is already waiting in one go
+            batch = [get()]
+            while True:
+                try:
+                    batch.append(get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = None in batch
+            if stop:
+                batch = batch[:batch.index(None)]
+            
+            self._write_rows(batch)
+            
+            if stop:
+                break
+    
+    def _write_rows(self, batch):
+        """
+        Write queued (filename, new_file, rows) entries, reusing the open file
+        for consecutive appends to the same filename
+        
+        Args:
+            batch (list): Entries queued by save_historical_data
+        """
+        f = None
+        current = None
+        try:
+            for filename, new_file, rows in batch:
+                if f and (new_file or filename != current):
+                    self._close_csv(f, current)
+                    f = None
+                
+                # After a failed write the file is incomplete (possibly with
+                # no header); drop appends until a full rewrite is queued
+                if filename in self._failed_csv and not new_file:
+                    self._csv_filename = None
+                    continue
+                
+                try:
+                    if f is None:
+                        f = open(filename, 'w' if new_file else 'a', newline='', buffering=1 << 20)
+                        writer = csv.writer(f)
+                        if new_file:
+                            writer.writerow(CANDLE_COLUMNS)
+                            self._failed_csv.discard(filename)
+                        current = filename
+                    
+                    writer.writerows(map(_candle_row, rows))
+                    logger.info("Historical data saved to %s (%d new records)", filename, len(rows))
+                except Exception as e:
+                    self._csv_write_failed(filename, e)
+                    if f:
+                        try:
+                            f.close()
+                        except Exception:
+                            pass
+                        f = None
+        finally:
+            if f:
+                self._close_csv(f, current)
+    
+    def _close_csv(self, f, filename):
+        """
+        Close a CSV file, treating a failed final flush as a failed write
+        """
+        try:
+            f.close()
+        except Exception as e:
+            self._csv_write_failed(filename, e)
+    
+    def _csv_write_failed(self, filename, error):
+        """
+        Record a failed CSV write so the next save rewrites the whole file
+        """
+        logger.error("Error writing historical data to %s: %s", filename, error)
+        self._failed_csv.add(filename)
+        self._csv_filename = None
+    
     def load_historical_data(self, filename=None):
         """
         Load historical data from CSV file
@@ -87,11 +416,11 @@ class CryptoBot:
                 filename = self.get_data_filename("historical")
             
             if os.path.exists(filename):
-                df = pd.read_csv(filename)
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
+                df = pd.read_csv(filename, engine=CSV_ENGINE, dtype=CANDLE_DTYPES)
                 
-                with self.data_lock:
-                    self.historical_data = df
+                self._candles = df.to_dict('records')
+                self._csv_filename = filename
+                self._csv_flushed_idx = len(self._candles)
                 
                 logger.info(f"Historical data loaded from {filename} ({len(df)} records)")
                 return df
@@ -109,6 +438,9 @@ class CryptoBot:
         Args:
             interval (str): Kline interval (1, 3, 5, 15, 30, 60, 120, 240, 360, 720, D, W, M)
             hours (int): Number of hours to fetch (default: 48)
+        
+        Returns:
+            list: Candle records (oldest first), or None on failure
         """
         try:
             # Calculate start time (48 hours ago)
@@ -130,33 +462,29 @@ class CryptoBot:
             if response['retCode'] == 0:
                 klines = response['result']['list']
                 
-                # Convert to DataFrame
-                df = pd.DataFrame(klines, columns=[
-                    'timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover'
-                ])
+                # Bybit returns newest first; reverse once (oldest first)
+                arr = np.array(klines, dtype=object)[::-1]
                 
-                # Convert data types
-                df['timestamp'] = pd.to_datetime(df['timestamp'].astype(int), unit='ms')
-                df['open'] = df['open'].astype(float)
-                df['high'] = df['high'].astype(float)
-                df['low'] = df['low'].astype(float)
-                df['close'] = df['close'].astype(float)
-                df['volume'] = df['volume'].astype(float)
-                df['turnover'] = df['turnover'].astype(float)
+                # Convert data types in bulk
+                ts = arr[:, 0].astype(np.int64)
+                floats = arr[:, 1:7].astype(np.float64)
                 
-                # Sort by timestamp (oldest first)
-                df = df.sort_values('timestamp').reset_index(drop=True)
+                # Build candle records straight from the columns
+                candles = [
+                    dict(zip(CANDLE_COLUMNS, row))
+                    for row in zip(ts.tolist(), *floats.T.tolist())
+                ]
                 
-                with self.data_lock:
-                    self.historical_data = df
+                self._candles = candles
+                self._csv_filename = None
                 
-                logger.info(f"Successfully fetched {len(df)} candles")
-                logger.info(f"Data range: {df['timestamp'].iloc[0]} to {df['timestamp'].iloc[-1]}")
+                logger.info(f"Successfully fetched {len(candles)} candles")
+                logger.info(f"Data range: {format_ms(ts[0])} to {format_ms(ts[-1])}")
                 
                 # Save historical data to CSV
                 self.save_historical_data()
                 
-                return df
+                return candles
             else:
                 logger.error(f"Error fetching data: {response['retMsg']}")
                 return None
@@ -169,121 +497,182 @@ class CryptoBot:
         """
         Initialize the current 1-minute candle
         """
-        now = datetime.now()
         # Round down to the current minute
-        self.candle_start_time = now.replace(second=0, microsecond=0)
-        
-        self.current_candle = {
-            'timestamp': self.candle_start_time,
-            'open': None,
-            'high': None,
-            'low': None,
-            'close': None,
-            'volume': 0.0,
-            'turnover': 0.0,
-            'trade_count': 0
-        }
+        self._candle_bucket = int(time.time()) // 60
+        self._candle_state[:] = EMPTY_CANDLE
         
-        logger.info(f"Initialized new candle for {self.candle_start_time}")
+        logger.info(f"Initialized new candle for {format_ms(self._candle_bucket * 60000)}")
     
-    def update_current_candle(self, price, volume):
+    def finalize_candle(self):
         """
-        Update the current candle with new trade data
-        
-        Args:
-            price (float): Trade price
-            volume (float): Trade volume
-        """
-        with self.data_lock:
-            if self.current_candle['open'] is None:
-                self.current_candle['open'] = price
-                self.current_candle['high'] = price
-                self.current_candle['low'] = price
-            else:
-                self.current_candle['high'] = max(self.current_candle['high'], price)
-                self.current_candle['low'] = min(self.current_candle['low'], price)
+        Finalize the current candle and add it to historical data
+        """
+        o, h, l, c, v, t, n = map(float, self._candle_state)
+        if n > 0:
+            # Add to historical data
+            self._candles.append({
+                'timestamp': self._candle_bucket * 60000,
+                'open': o,
+                'high': h,
+                'low': l,
+                'close': c,
+                'volume': v,
+                'turnover': t
+            })
+            
+            # Logged once per batch by _log_finalized_candles
+            self._finalized.append(self._candles[-1])
             
-            self.current_candle['close'] = price
-            self.current_candle['volume'] += volume
-            self.current_candle['turnover'] += price * volume
-            self.current_candle['trade_count'] += 1
+            # Save updated data every 10 candles to avoid excessive I/O
+            if len(self._candles) % 10 == 0:
+                self.save_historical_data()
     
-    def finalize_candle(self):
+    def _log_finalized_candles(self):
         """
-        Finalize the current candle and add it to historical data
+        Log candles finalized since the last call in a single record
         """
-        with self.data_lock:
-            if self.current_candle and self.current_candle['open'] is not None:
-                # Create new row for historical data
-                new_row = pd.DataFrame([{
-                    'timestamp': self.current_candle['timestamp'],
-                    'open': self.current_candle['open'],
-                    'high': self.current_candle['high'],
-                    'low': self.current_candle['low'],
-                    'close': self.current_candle['close'],
-                    'volume': self.current_candle['volume'],
-                    'turnover': self.current_candle['turnover']
-                }])
-                
-                # Add to historical data
-                self.historical_data = pd.concat([self.historical_data, new_row], ignore_index=True)
-                
-                logger.info(f"Finalized candle: O:{self.current_candle['open']:.2f} H:{self.current_candle['high']:.2f} L:{self.current_candle['low']:.2f} C:{self.current_candle['close']:.2f} V:{self.current_candle['volume']:.4f}")
-                
-                # Save updated data every 10 candles to avoid excessive I/O
-                if len(self.historical_data) % 10 == 0:
-                    self.save_historical_data()
+        if not self._finalized:
+            return
+        
+        candles = list(self._finalized)
+        self._finalized.clear()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Finalized %d candle(s):\n%s", len(candles), "\n".join(
+                f"  {format_ms(c['timestamp'])} O:{c['open']:.2f} H:{c['high']:.2f} "
+                f"L:{c['low']:.2f} C:{c['close']:.2f} V:{c['volume']:.4f}"
+                for c in candles
+            ))
     
-    def on_message(self, ws, message):
+    def store_trades(self, ts, prices, volumes):
         """
-        Handle WebSocket messages
+        Copy a batch of trades into the recent-trades ring buffer
+        
+        Args:
+            ts, prices, volumes: Trade column arrays (oldest first)
+        """
+        n = len(ts)
+        size = len(self._live_ts)
+        head = self._trade_head
+        
+        # Only the newest `size` trades can survive
+        if n > size:
+            head += n - size
+            ts, prices, volumes = ts[-size:], prices[-size:], volumes[-size:]
+        
+        pos = head % size
+        first = min(len(ts), size - pos)
+        self._live_ts[pos:pos + first] = ts[:first]
+        self._live_px[pos:pos + first] = prices[:first]
+        self._live_vol[pos:pos + first] = volumes[:first]
+        
+        # Wrap around to the start of the buffer
+        rest = len(ts) - first
+        if rest:
+            self._live_ts[:rest] = ts[first:]
+            self._live_px[:rest] = prices[first:]
+            self._live_vol[:rest] = volumes[first:]
+        
+        self._trade_head += n
+    
+    def process_trades(self):
         """
+        Aggregate the decoded trade batch into candles
+        
+        Must only be called from the consumer thread.
+        """
+        n = len(self._batch_ts)
+        if n == 0:
+            return
+        
+        # Grow the preallocated buffers if this batch does not fit
+        if n > len(self._ts_buf):
+            size = 2 * n
+            self._ts_buf = np.empty(size, dtype=np.int64)
+            self._px_buf = np.empty(size, dtype=np.float64)
+            self._vol_buf = np.empty(size, dtype=np.float64)
+        
+        ts = self._ts_buf[:n]
+        prices = self._px_buf[:n]
+        volumes = self._vol_buf[:n]
         try:
-            data = json.loads(message)
+            ts[:] = self._batch_ts
+            prices[:] = self._batch_px
+            volumes[:] = self._batch_vol
+        finally:
+            # Never carry a batch over, even one that failed to copy
+            self._batch_ts.clear()
+            self._batch_px.clear()
+            self._batch_vol.clear()
+        
+        self.store_trades(ts, prices, volumes)
+        
+        # Bursts often share a millisecond; aggregate one tick per ms
+        ts, ticks = _coalesce_trades(ts, prices, volumes)
+        m = len(ts)
+        if not HAVE_NUMBA:
+            # Interpreted, the kernel indexes plain lists much faster than
+            # numpy arrays (no scalar boxing per element)
+            ts, ticks = ts.tolist(), ticks.tolist()
+        
+        state = self._candle_state
+        i = 0
+        while i < m:
+            # Start a new candle when the next tick is in a later minute
+            bucket = int(ts[i]) // 60000
+            if bucket > self._candle_bucket:
+                self.finalize_candle()
+                self._candle_bucket = bucket
+                state[:] = EMPTY_CANDLE
             
-            # Handle trade data
-            if 'topic' in data and 'publicTrade' in data['topic']:
-                trades = data.get('data', [])
-                
-                for trade in trades:
-                    price = float(trade['p'])
-                    volume = float(trade['v'])
-                    timestamp = int(trade['T'])
-                    
-                    # Store trade
-                    self.live_trades.append({
-                        'timestamp': timestamp,
-                        'price': price,
-                        'volume': volume
-                    })
-                    
-                    # Check if we need to start a new candle
-                    current_time = datetime.fromtimestamp(timestamp / 1000)
-                    current_minute = current_time.replace(second=0, microsecond=0)
-                    
-                    if self.candle_start_time is None or current_minute > self.candle_start_time:
-                        # Finalize previous candle if it exists
-                        if self.current_candle is not None:
-                            self.finalize_candle()
-                        
-                        # Start new candle
-                        self.candle_start_time = current_minute
-                        self.current_candle = {
-                            'timestamp': current_minute,
-                            'open': price,
-                            'high': price,
-                            'low': price,
-                            'close': price,
-                            'volume': volume,
-                            'turnover': price * volume,
-                            'trade_count': 1
-                        }
-                    else:
-                        # Update current candle
-                        self.update_current_candle(price, volume)
-                        
+            i = _aggregate_ticks(ts, ticks, i, self._candle_bucket, state)
+        
+        self._log_finalized_candles()
+    
+    def decode_message(self, message):
+        """
+        Decode a raw WebSocket message and queue its trades
+        
+        Args:
+            message (bytes): Raw WebSocket message
+        """
+        try:
+            self._parse_trades(message)
         except Exception as e:
-            logger.error(f"Error processing WebSocket message: {e}")
+            logger.error("Error processing WebSocket message: %s", e)
+    
+    def _consume_messages(self):
+        """
+        Consumer thread: decode raw messages and build candles until stopped
+        """
+        get = self._raw_q.get
+        get_nowait = self._raw_q.get_nowait
+        while True:
+            message = get()
+            
+            # Decode everything that is already waiting before aggregating
+            while message is not None:
+                self.decode_message(message)
+                try:
+                    message = get_nowait()
+                except queue.Empty:
+                    break
+            
+            try:
+                self.process_trades()
+            except Exception as e:
+                logger.error("Error processing trades: %s", e)
+            
+            if message is None:
+                break
+    
+    def on_message(self, ws, message):
+        """
+        Handle WebSocket messages (queued for the consumer thread)
+        
+        Messages arrive as undecoded bytes because run_forever is started
+        with skip_utf8_validation=True.
+        """
+        self._raw_q.put(message)
     
     def on_error(self, ws, error):
         """
@@ -304,13 +693,8 @@ class CryptoBot:
         """
         logger.info("WebSocket connection opened")
         
-        # Subscribe to public trades
-        subscribe_msg = {
-            "op": "subscribe",
-            "args": [f"publicTrade.{self.symbol}"]
-        }
-        
-        ws.send(json.dumps(subscribe_msg))
+        # Subscribe to public trades (payload encoded once in start_live_stream)
+        ws.send(self._subscribe_payload)
         logger.info(f"Subscribed to {self.symbol} trades")
     
     def start_live_stream(self):
@@ -324,6 +708,12 @@ class CryptoBot:
             # WebSocket URL for Bybit mainnet
             ws_url = "wss://stream.bybit.com/v5/public/spot"
             
+            # Encode the subscribe request once; on_open resends it as-is
+            self._subscribe_payload = dumps({
+                "op": "subscribe",
+                "args": [f"publicTrade.{self.symbol}"]
+            })
+            
             # Create WebSocket connection
             self.ws = websocket.WebSocketApp(
                 ws_url,
@@ -335,10 +725,21 @@ class CryptoBot:
             
             self.running = True
             
-            # Start WebSocket in a separate thread with SSL context
+            # Start the consumer before any messages can arrive
+            self.consumer_thread = threading.Thread(target=self._consume_messages)
+            self.consumer_thread.daemon = True
+            self.consumer_thread.start()
+            
+            # Start WebSocket in a separate thread with the verifying SSL context
             self.ws_thread = threading.Thread(
                 target=lambda: self.ws.run_forever(
-                    sslopt={"cert_reqs": ssl.CERT_NONE}
+                    sslopt={"context": self._ssl_context},
+                    # Detect dead connections within ~30 seconds
+                    ping_interval=20,
+                    ping_timeout=10,
+                    # Deliver text frames as raw bytes (no UTF-8 decode);
+                    # loads() parses bytes directly
+                    skip_utf8_validation=True
                 )
             )
             self.ws_thread.daemon = True
@@ -358,6 +759,10 @@ class CryptoBot:
             self.ws.close()
         if self.ws_thread:
             self.ws_thread.join(timeout=5)
+        if self.consumer_thread:
+            # Sentinel: consumer finishes queued messages, then exits
+            self._raw_q.put(None)
+            self.consumer_thread.join(timeout=5)
         
         logger.info("Live stream stopped")
     
@@ -368,24 +773,52 @@ class CryptoBot:
         Args:
             rows (int): Number of latest rows to return
         """
-        with self.data_lock:
-            if len(self.historical_data) > 0:
-                return self.historical_data.tail(rows)
-            return pd.DataFrame()
+        candles = self._candles
+        if candles:
+            return pd.DataFrame(candles[max(len(candles) - rows, 0):], columns=CANDLE_COLUMNS)
+        return pd.DataFrame()
+    
+    def get_recent_trades(self, rows=100):
+        """
+        Get the most recent live trades
+        
+        Args:
+            rows (int): Number of latest trades to return (at most 10000)
+        """
+        size = len(self._live_ts)
+        head = self._trade_head
+        count = min(rows, head, size)
+        idx = np.arange(head - count, head) % size
+        return pd.DataFrame({
+            'timestamp': self._live_ts[idx],
+            'price': self._live_px[idx],
+            'volume': self._live_vol[idx]
+        })
     
     def get_current_candle_info(self):
         """
         Get current candle information
         """
-        with self.data_lock:
-            if self.current_candle:
-                return self.current_candle.copy()
+        if self._candle_bucket < 0:
             return None
+        
+        o, h, l, c, v, t, n = map(float, self._candle_state)
+        return {
+            'timestamp': self._candle_bucket * 60000,
+            'open': o if n else None,
+            'high': h if n else None,
+            'low': l if n else None,
+            'close': c if n else None,
+            'volume': v,
+            'turnover': t,
+            'trade_count': int(n)
+        }
     
     def run(self):
         """
         Main run method
         """
+        log_listener = start_queue_logging()
         try:
             # Step 1: Fetch historical data
             logger.info("Starting crypto bot...")
@@ -403,27 +836,32 @@ class CryptoBot:
                 time.sleep(10)  # Update every 10 seconds
                 
                 # Display current stats
+                if not logger.isEnabledFor(logging.INFO):
+                    continue
+                
                 current_candle = self.get_current_candle_info()
-                latest_data = self.get_latest_data(3)
+                candles = self._candles
                 
-                logger.info(f"Historical candles: {len(self.historical_data)}")
-                logger.info(f"Live trades received: {len(self.live_trades)}")
+                logger.info("Historical candles: %d", len(candles))
+                logger.info("Live trades received: %d", self._trade_head)
                 
                 if current_candle:
-                    logger.info(f"Current candle: {current_candle}")
+                    logger.info("Current candle: %s", current_candle)
                 
-                if not latest_data.empty:
-                    logger.info(f"Latest close price: {latest_data['close'].iloc[-1]:.2f}")
+                if candles:
+                    logger.info("Latest close price: %.2f", candles[-1]['close'])
                 
         except KeyboardInterrupt:
             logger.info("Received interrupt signal")
         except Exception as e:
             logger.error(f"Error in main run loop: {e}")
         finally:
-            # Save final data before stopping
-            self.save_historical_data()
+            # Stop the stream (consumer drains its queue), then save
             self.stop_live_stream()
+            self.save_historical_data()
+            self.stop_writer()
             logger.info("Bot stopped")
+            stop_queue_logging(log_listener)
 
 if __name__ == "__main__":
     # Create and run the bot